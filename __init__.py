@@ -0,0 +1,12 @@
+import asyncio
+
+def install_uvloop() -> bool:
+    # Switch the process to uvloop's faster event loop when it is installed.
+    # Call once at application startup, before any event loop is created;
+    # returns whether uvloop is now in use
+    try:
+        import uvloop
+    except ImportError:
+        return False
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    return True
@@ -0,0 +1,62 @@
+import copy
+import hashlib
+import inspect
+import mmap
+from collections import OrderedDict
+from functools import lru_cache, wraps
+from types import MappingProxyType
+from typing import Callable, Mapping
+
+from ..json_utils import freeze_json, load_json
+
+@lru_cache(maxsize=None)
+def load_prompts_cached(prompts_path: str) -> Mapping:
+    # Parse each prompts file once per process; freezing it all the way down
+    # keeps reviewer/optimizer/generator/solver instances from mutating the
+    # shared parse
+    with open(prompts_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+        with memoryview(buf) as view:
+            data = load_json(view)
+    return freeze_json(data)
+
+@lru_cache(maxsize=None)
+def load_prompt_renderers(prompts_path: str) -> Mapping[str, Callable[..., str]]:
+    # Bind each template's format method once so call sites skip the
+    # nested prompts[name]['prompt'] lookups on every request
+    prompts = load_prompts_cached(prompts_path)
+    return MappingProxyType({name: spec['prompt'].format for name, spec in prompts.items()})
+
+def source_digest(code: str) -> str:
+    # Compact content address for a piece of source code
+    return hashlib.blake2b(code.encode(), digest_size=16).hexdigest()
+
+def memoize_by_source(maxsize: int = 256):
+    # Cache an async analysis method per instance, keyed on the digest of the
+    # code it is given, so unchanged sources are not analyzed twice
+    def decorator(method):
+        cache_attr = f"_{method.__name__}_cache"
+        signature = inspect.signature(method)
+        # The source is the first parameter after self, passed by position or name
+        code_param = list(signature.parameters)[1]
+        
+        @wraps(method)
+        async def wrapper(self, *args, **kwargs):
+            cache = self.__dict__.get(cache_attr)
+            if cache is None:
+                cache = self.__dict__[cache_attr] = OrderedDict()
+            
+            code = signature.bind(self, *args, **kwargs).arguments[code_param]
+            key = source_digest(code)
+            if key in cache:
+                cache.move_to_end(key)
+                # Hand out a copy so callers cannot alter the cached result
+                return copy.deepcopy(cache[key])
+            
+            result = await method(self, *args, **kwargs)
+            cache[key] = copy.deepcopy(result)
+            if len(cache) > maxsize:
+                cache.popitem(last=False)
+            return result
+        
+        return wrapper
+    return decorator
@@ -1,12 +1,82 @@
-import json
-from typing import Dict, List, Optional
+from typing import Dict, List, Mapping, Optional
+from types import MappingProxyType
 from dataclasses import dataclass
+import asyncio
 import os
+import re
+
+from .caching import load_prompt_renderers, load_prompts_cached, memoize_by_source
 
 # Get the base directory for the package
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
-@dataclass
+# Every keyword the security rules look for, compiled into one alternation so
+# a review finds all of them in a single pass over the source
+_SECURITY_SCANNER = re.compile(
+    r"(?P<require>require!)"
+    r"|(?P<assert>assert!)"
+    r"|(?P<pub_fn>pub fn)"
+    r"|(?P<invoke>invoke)"
+    r"|(?P<mut>mut)"
+)
+# Single-character operators are checked separately: matching them in the
+# alternation above would yield one match object per operator in the source
+_ARITHMETIC_OPERATORS = frozenset("+-*")
+
+# One bit per code feature the rules test for
+REQUIRE_BIT = 1 << 0
+ASSERT_BIT = 1 << 1
+PUB_FN_BIT = 1 << 2
+INVOKE_BIT = 1 << 3
+MUT_BIT = 1 << 4
+ARITHMETIC_BIT = 1 << 5
+
+_FEATURE_BITS = {
+    "require": REQUIRE_BIT,
+    "assert": ASSERT_BIT,
+    "pub_fn": PUB_FN_BIT,
+    "invoke": INVOKE_BIT,
+    "mut": MUT_BIT,
+}
+
+def _finding(finding_type: str, severity: str, description: str, suggestion: str) -> Mapping[str, str]:
+    return MappingProxyType({
+        "type": finding_type,
+        "severity": severity,
+        "description": description,
+        "suggestion": suggestion
+    })
+
+# (required bits, forbidden bits, finding) per security rule; findings are
+# read-only templates shared by every review instead of being rebuilt per match
+_SECURITY_RULES = (
+    # Check access control
+    (REQUIRE_BIT, 0, _finding(
+        "access_control", "info",
+        "Access control check found using require! macro",
+        "Ensure all sensitive operations are protected by appropriate checks"
+    )),
+    # Check input validation
+    (PUB_FN_BIT, ASSERT_BIT, _finding(
+        "input_validation", "medium",
+        "Function lacks input validation",
+        "Add input validation using assert! or require!"
+    )),
+    # Check arithmetic operations
+    (ARITHMETIC_BIT, 0, _finding(
+        "arithmetic", "medium",
+        "Potential integer overflow/underflow",
+        "Use checked arithmetic operations"
+    )),
+    # Check reentrancy
+    (INVOKE_BIT | MUT_BIT, 0, _finding(
+        "reentrancy", "high",
+        "Potential reentrancy vulnerability",
+        "Implement checks-effects-interactions pattern"
+    )),
+)
+
+@dataclass(slots=True, frozen=True)
 class CodeReviewResult:
     security_issues: List[Dict[str, str]]
     performance_suggestions: List[Dict[str, str]]
@@ -20,24 +90,27 @@ class SolanaCodeReviewer:
     
     def load_prompts(self):
         prompts_path = os.path.join(BASE_DIR, 'code_assistance_module/prompts/prompts.json')
-        with open(prompts_path, 'r') as f:
-            self.prompts = json.load(f)
+        self.prompts = load_prompts_cached(prompts_path)
+        self._compiled_prompts = load_prompt_renderers(prompts_path)
     
+    @memoize_by_source()
     async def review_code(self, code: str) -> CodeReviewResult:
         # Use AGiXT's Smart Instruct to analyze code
-        review_prompt = self.prompts['code_review']['prompt'].format(code=code)
-        
-        # Security checks
-        security_issues = await self._check_security(code)
-        
-        # Performance analysis
-        performance_suggestions = await self._analyze_performance(code)
-        
-        # Best practices validation
-        best_practices = await self._validate_best_practices(code)
+        review_prompt = self._compiled_prompts['code_review'](code=code)
         
-        # Warning detection
-        potential_warnings = await self._detect_warnings(code)
+        # Security checks, performance analysis, best practices validation and
+        # warning detection are independent, so run them concurrently
+        (
+            security_issues,
+            performance_suggestions,
+            best_practices,
+            potential_warnings
+        ) = await asyncio.gather(
+            self._check_security(code),
+            self._analyze_performance(code),
+            self._validate_best_practices(code),
+            self._detect_warnings(code)
+        )
         
         return CodeReviewResult(
             security_issues=security_issues,
@@ -48,45 +121,24 @@ class SolanaCodeReviewer:
     
     async def _check_security(self, code: str) -> List[Dict[str, str]]:
         # Implement security checks
-        security_issues = []
-        
-        # Check access control
-        if "require!" in code:
-            security_issues.append({
-                "type": "access_control",
-                "severity": "info",
-                "description": "Access control check found using require! macro",
-                "suggestion": "Ensure all sensitive operations are protected by appropriate checks"
-            })
-        
-        # Check input validation
-        if "pub fn" in code and "assert!" not in code:
-            security_issues.append({
-                "type": "input_validation",
-                "severity": "medium",
-                "description": "Function lacks input validation",
-                "suggestion": "Add input validation using assert! or require!"
-            })
-        
-        # Check arithmetic operations
-        if "+" in code or "-" in code or "*" in code:
-            security_issues.append({
-                "type": "arithmetic",
-                "severity": "medium",
-                "description": "Potential integer overflow/underflow",
-                "suggestion": "Use checked arithmetic operations"
-            })
-        
-        # Check reentrancy
-        if "invoke" in code and "mut" in code:
-            security_issues.append({
-                "type": "reentrancy",
-                "severity": "high",
-                "description": "Potential reentrancy vulnerability",
-                "suggestion": "Implement checks-effects-interactions pattern"
-            })
-        
-        return security_issues
+        features = self._extract_features(code)
+        # Copy the shared read-only findings into plain dicts so results
+        # serialize with dataclasses.asdict and json.dumps
+        return [
+            dict(finding)
+            for required, forbidden, finding in _SECURITY_RULES
+            if features & (required | forbidden) == required
+        ]
+    
+    def _extract_features(self, code: str) -> int:
+        # Build a bitmask of every feature present in the code in one pass
+        features = 0
+        for match in _SECURITY_SCANNER.finditer(code):
+            features |= _FEATURE_BITS[match.lastgroup]
+        # Stops at the first operator found
+        if not _ARITHMETIC_OPERATORS.isdisjoint(code):
+            features |= ARITHMETIC_BIT
+        return features
     
     async def _analyze_performance(self, code: str) -> List[Dict[str, str]]:
         # Implement performance analysis
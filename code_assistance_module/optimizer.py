@@ -1,12 +1,14 @@
-import json
 from typing import Dict, List
 from dataclasses import dataclass
+import asyncio
 import os
 
+from .caching import load_prompt_renderers, load_prompts_cached, memoize_by_source
+
 # Get the base directory for the package
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class OptimizationSuggestion:
     category: str
     description: str
@@ -22,30 +24,24 @@ class SolanaOptimizer:
     
     def load_prompts(self):
         prompts_path = os.path.join(BASE_DIR, 'code_assistance_module/prompts/prompts.json')
-        with open(prompts_path, 'r') as f:
-            self.prompts = json.load(f)
+        self.prompts = load_prompts_cached(prompts_path)
+        self._compiled_prompts = load_prompt_renderers(prompts_path)
     
+    @memoize_by_source()
     async def analyze_code(self, contract_code: str) -> List[OptimizationSuggestion]:
         # Use AGiXT's Smart Instruct to analyze code for optimization
-        optimization_prompt = self.prompts['optimization_suggestions']['prompt'].format(
+        optimization_prompt = self._compiled_prompts['optimization_suggestions'](
             contract_code=contract_code
         )
         
-        suggestions = []
-        
-        # Analyze compute unit usage
-        compute_suggestions = await self._analyze_compute_usage(contract_code)
-        suggestions.extend(compute_suggestions)
-        
-        # Analyze memory efficiency
-        memory_suggestions = await self._analyze_memory_efficiency(contract_code)
-        suggestions.extend(memory_suggestions)
-        
-        # Analyze storage optimization
-        storage_suggestions = await self._analyze_storage_optimization(contract_code)
-        suggestions.extend(storage_suggestions)
+        # Compute unit, memory and storage analyses are independent
+        compute_suggestions, memory_suggestions, storage_suggestions = await asyncio.gather(
+            self._analyze_compute_usage(contract_code),
+            self._analyze_memory_efficiency(contract_code),
+            self._analyze_storage_optimization(contract_code)
+        )
         
-        return suggestions
+        return compute_suggestions + memory_suggestions + storage_suggestions
     
     async def _analyze_compute_usage(self, contract_code: str) -> List[OptimizationSuggestion]:
         compute_suggestions = []
@@ -93,15 +89,15 @@ class SolanaOptimizer:
         return storage_suggestions
     
     def get_optimization_report(self, suggestions: List[OptimizationSuggestion]) -> str:
-        report = "# Solana Smart Contract Optimization Report\n\n"
+        parts = ["# Solana Smart Contract Optimization Report\n\n"]
         
         for suggestion in suggestions:
-            report += f"## {suggestion.category}\n"
-            report += f"Priority: {suggestion.priority}\n\n"
-            report += f"### Description\n{suggestion.description}\n\n"
-            report += f"### Current Code\n```rust\n{suggestion.current_code}\n```\n\n"
-            report += f"### Suggested Code\n```rust\n{suggestion.suggested_code}\n```\n\n"
-            report += f"### Impact\n{suggestion.impact}\n\n"
-            report += "---\n\n"
+            parts.append(f"## {suggestion.category}\n")
+            parts.append(f"Priority: {suggestion.priority}\n\n")
+            parts.append(f"### Description\n{suggestion.description}\n\n")
+            parts.append(f"### Current Code\n```rust\n{suggestion.current_code}\n```\n\n")
+            parts.append(f"### Suggested Code\n```rust\n{suggestion.suggested_code}\n```\n\n")
+            parts.append(f"### Impact\n{suggestion.impact}\n\n")
+            parts.append("---\n\n")
         
-        return report
+        return "".join(parts)
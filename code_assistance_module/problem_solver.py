@@ -1,35 +1,42 @@
-import json
-from typing import Dict, List
+from typing import Dict, Tuple
 from dataclasses import dataclass
 import os
+import re
+
+from .caching import load_prompts_cached
 
 # Get the base directory for the package
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
-@dataclass
+# Keywords that identify each common problem type
+_PROBLEM_KEYWORDS = {
+    "account_size_error": ["account", "size", "too small", "space"],
+    "unauthorized_signer": ["unauthorized", "signer", "permission"],
+    "compute_budget": ["compute", "budget", "exceeded", "units"]
+}
+
+# All keywords in one alternation with a named group per problem type. Each
+# branch is a lookahead so every keyword occurrence is reported, even where
+# it overlaps an occurrence of another problem's keyword
+_PROBLEM_SCANNER = re.compile("|".join(
+    f"(?=(?P<{problem_type}>{'|'.join(map(re.escape, keywords))}))"
+    for problem_type, keywords in _PROBLEM_KEYWORDS.items()
+))
+
+@dataclass(slots=True, frozen=True)
 class Solution:
     problem: str
     solution: str
     code_example: str
-    references: List[str]
+    # A tuple, so the shared canned solutions cannot be changed through a result
+    references: Tuple[str, ...]
 
-class SolanaProblemSolver:
-    def __init__(self, agent_config: Dict):
-        self.config = agent_config
-        self.load_prompts()
-        self.common_problems = self._initialize_common_problems()
-    
-    def load_prompts(self):
-        prompts_path = os.path.join(BASE_DIR, 'code_assistance_module/prompts/prompts.json')
-        with open(prompts_path, 'r') as f:
-            self.prompts = json.load(f)
-    
-    def _initialize_common_problems(self) -> Dict[str, Solution]:
-        return {
-            "account_size_error": Solution(
-                problem="Account size is too small for the data being stored",
-                solution="Calculate correct account size including discriminator and all fields",
-                code_example="""
+# Known problems and their canned solutions, shared by every solver instance
+_COMMON_PROBLEMS: Dict[str, Solution] = {
+    "account_size_error": Solution(
+        problem="Account size is too small for the data being stored",
+        solution="Calculate correct account size including discriminator and all fields",
+        code_example="""
                 #[account]
                 pub struct MyAccount {
                     pub data: Vec<u8>,
@@ -42,15 +49,15 @@ class SolanaProblemSolver:
                     }
                 }
                 """,
-                references=[
-                    "https://docs.solana.com/developing/programming-model/accounts",
-                    "https://docs.rs/anchor-lang/latest/anchor_lang/attr.account.html"
-                ]
-            ),
-            "unauthorized_signer": Solution(
-                problem="Transaction failed due to missing or invalid signer",
-                solution="Ensure all required signers are included and properly validated",
-                code_example="""
+        references=(
+            "https://docs.solana.com/developing/programming-model/accounts",
+            "https://docs.rs/anchor-lang/latest/anchor_lang/attr.account.html"
+        )
+    ),
+    "unauthorized_signer": Solution(
+        problem="Transaction failed due to missing or invalid signer",
+        solution="Ensure all required signers are included and properly validated",
+        code_example="""
                 #[derive(Accounts)]
                 pub struct Initialize<'info> {
                     #[account(mut)]
@@ -61,47 +68,53 @@ class SolanaProblemSolver:
                 // In your instruction
                 require!(ctx.accounts.authority.key() == expected_authority, ErrorCode::Unauthorized);
                 """,
-                references=[
-                    "https://docs.solana.com/developing/programming-model/accounts#signers",
-                    "https://docs.rs/anchor-lang/latest/anchor_lang/derive.Accounts.html"
-                ]
-            ),
-            "compute_budget": Solution(
-                problem="Transaction exceeded compute budget",
-                solution="Optimize compute-intensive operations and request additional compute units if needed",
-                code_example="""
+        references=(
+            "https://docs.solana.com/developing/programming-model/accounts#signers",
+            "https://docs.rs/anchor-lang/latest/anchor_lang/derive.Accounts.html"
+        )
+    ),
+    "compute_budget": Solution(
+        problem="Transaction exceeded compute budget",
+        solution="Optimize compute-intensive operations and request additional compute units if needed",
+        code_example="""
                 use solana_program::compute_budget::ComputeBudgetInstruction;
                 
                 // Request additional compute units
                 let compute_ix = ComputeBudgetInstruction::request_units(300_000);
                 let message = Message::new(&[compute_ix, your_instruction], Some(&payer.pubkey()));
                 """,
-                references=[
-                    "https://docs.solana.com/developing/programming-model/runtime",
-                    "https://docs.rs/solana-program/latest/solana_program/compute_budget/index.html"
-                ]
-            )
-        }
+        references=(
+            "https://docs.solana.com/developing/programming-model/runtime",
+            "https://docs.rs/solana-program/latest/solana_program/compute_budget/index.html"
+        )
+    )
+}
+
+# Position of each problem type in _COMMON_PROBLEMS, used to break ties when a
+# description mentions several
+_PROBLEM_PRIORITY = {problem_type: rank for rank, problem_type in enumerate(_COMMON_PROBLEMS)}
+
+class SolanaProblemSolver:
+    def __init__(self, agent_config: Dict):
+        self.config = agent_config
+        self.load_prompts()
+        self.common_problems = _COMMON_PROBLEMS
+    
+    def load_prompts(self):
+        prompts_path = os.path.join(BASE_DIR, 'code_assistance_module/prompts/prompts.json')
+        self.prompts = load_prompts_cached(prompts_path)
     
     async def find_solution(self, problem_description: str) -> Solution:
         # Use AGiXT's Smart Instruct to analyze problem and find solution
-        for problem_type, solution in self.common_problems.items():
-            if self._matches_problem(problem_description, problem_type):
-                return solution
+        # One scan of the description finds every problem type it mentions;
+        # the one listed first in the common problems wins
+        matched = {match.lastgroup for match in _PROBLEM_SCANNER.finditer(problem_description.lower())}
+        if matched:
+            return self.common_problems[min(matched, key=_PROBLEM_PRIORITY.__getitem__)]
         
         # If no exact match found, generate custom solution
         return await self._generate_custom_solution(problem_description)
     
-    def _matches_problem(self, description: str, problem_type: str) -> bool:
-        # Implement problem matching logic
-        keywords = {
-            "account_size_error": ["account", "size", "too small", "space"],
-            "unauthorized_signer": ["unauthorized", "signer", "permission"],
-            "compute_budget": ["compute", "budget", "exceeded", "units"]
-        }
-        
-        return any(keyword in description.lower() for keyword in keywords.get(problem_type, []))
-    
     async def _generate_custom_solution(self, problem_description: str) -> Solution:
         # Use AGiXT's Smart Instruct to generate custom solution
         # This is a placeholder implementation
@@ -109,11 +122,12 @@ class SolanaProblemSolver:
             problem=problem_description,
             solution="Custom solution will be generated based on the specific problem",
             code_example="// Custom code example will be generated",
-            references=["Relevant documentation links will be provided"]
+            references=("Relevant documentation links will be provided",)
         )
     
     def format_solution(self, solution: Solution) -> str:
-        formatted_solution = f"""
+        references = "".join(f"- {ref}\n" for ref in solution.references)
+        return f"""
 # Problem
 {solution.problem}
 
@@ -126,8 +140,4 @@ class SolanaProblemSolver:
 ```
 
 # References
-"""
-        for ref in solution.references:
-            formatted_solution += f"- {ref}\n"
-        
-        return formatted_solution
+{references}"""
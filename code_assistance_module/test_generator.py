@@ -1,102 +1,21 @@
-import json
-from typing import Dict, List
+from typing import Dict, List, Tuple
 from dataclasses import dataclass
+import asyncio
 import os
 
+from .caching import load_prompt_renderers, load_prompts_cached, memoize_by_source
+
 # Get the base directory for the package
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class TestCase:
     name: str
     description: str
     test_code: str
     expected_result: str
 
-class SolanaTestGenerator:
-    def __init__(self, agent_config: Dict):
-        self.config = agent_config
-        self.load_prompts()
-    
-    def load_prompts(self):
-        prompts_path = os.path.join(BASE_DIR, 'code_assistance_module/prompts/prompts.json')
-        with open(prompts_path, 'r') as f:
-            self.prompts = json.load(f)
-    
-    async def generate_tests(self, contract_code: str) -> List[TestCase]:
-        # Use AGiXT's Smart Instruct to generate tests
-        test_prompt = self.prompts['test_generation']['prompt'].format(
-            contract_code=contract_code
-        )
-        
-        test_cases = []
-        
-        # Generate unit tests
-        unit_tests = await self._generate_unit_tests(contract_code)
-        test_cases.extend(unit_tests)
-        
-        # Generate integration tests
-        integration_tests = await self._generate_integration_tests(contract_code)
-        test_cases.extend(integration_tests)
-        
-        # Generate security tests
-        security_tests = await self._generate_security_tests(contract_code)
-        test_cases.extend(security_tests)
-        
-        return test_cases
-    
-    async def _generate_unit_tests(self, contract_code: str) -> List[TestCase]:
-        # Generate unit tests for each public function
-        unit_tests = []
-        
-        # Basic functionality tests
-        unit_tests.append(TestCase(
-            name="test_initialization",
-            description="Test contract initialization with valid parameters",
-            test_code=self._generate_init_test(),
-            expected_result="Contract initializes successfully"
-        ))
-        
-        # Error case tests
-        unit_tests.append(TestCase(
-            name="test_invalid_parameters",
-            description="Test contract initialization with invalid parameters",
-            test_code=self._generate_invalid_params_test(),
-            expected_result="Contract initialization fails with appropriate error"
-        ))
-        
-        return unit_tests
-    
-    async def _generate_integration_tests(self, contract_code: str) -> List[TestCase]:
-        # Generate integration tests
-        integration_tests = []
-        
-        # Interaction with other programs
-        integration_tests.append(TestCase(
-            name="test_token_interaction",
-            description="Test interaction with SPL Token program",
-            test_code=self._generate_token_interaction_test(),
-            expected_result="Token operations execute successfully"
-        ))
-        
-        return integration_tests
-    
-    async def _generate_security_tests(self, contract_code: str) -> List[TestCase]:
-        # Generate security-focused tests
-        security_tests = []
-        
-        # Authority checks
-        security_tests.append(TestCase(
-            name="test_unauthorized_access",
-            description="Test unauthorized access attempts",
-            test_code=self._generate_unauthorized_access_test(),
-            expected_result="Unauthorized access attempts are rejected"
-        ))
-        
-        return security_tests
-    
-    def _generate_init_test(self) -> str:
-        return """
+_INIT_TEST = """
         #[test]
         fn test_initialize() {
             let program = ProgramTest::new(
@@ -132,29 +51,115 @@ class SolanaTestGenerator:
             banks_client.process_transaction(transaction).unwrap();
         }
         """
-    
-    def _generate_invalid_params_test(self) -> str:
-        return """
+
+_INVALID_PARAMS_TEST = """
         #[test]
         #[should_panic(expected = "Invalid parameters")]
         fn test_initialize_invalid_params() {
             // Similar to test_initialize but with invalid parameters
         }
         """
-    
-    def _generate_token_interaction_test(self) -> str:
-        return """
+
+_TOKEN_INTERACTION_TEST = """
         #[test]
         fn test_token_operations() {
             // Test token mint, transfer, burn operations
         }
         """
-    
-    def _generate_unauthorized_access_test(self) -> str:
-        return """
+
+_UNAUTHORIZED_ACCESS_TEST = """
         #[test]
         #[should_panic(expected = "Unauthorized")]
         fn test_unauthorized_access() {
             // Test unauthorized access attempts
         }
         """
+
+# Boilerplate test cases are identical for every contract, so they are built
+# once at import time and shared between calls
+_UNIT_TESTS = (
+    # Basic functionality tests
+    TestCase(
+        name="test_initialization",
+        description="Test contract initialization with valid parameters",
+        test_code=_INIT_TEST,
+        expected_result="Contract initializes successfully"
+    ),
+    # Error case tests
+    TestCase(
+        name="test_invalid_parameters",
+        description="Test contract initialization with invalid parameters",
+        test_code=_INVALID_PARAMS_TEST,
+        expected_result="Contract initialization fails with appropriate error"
+    ),
+)
+
+_INTEGRATION_TESTS = (
+    # Interaction with other programs
+    TestCase(
+        name="test_token_interaction",
+        description="Test interaction with SPL Token program",
+        test_code=_TOKEN_INTERACTION_TEST,
+        expected_result="Token operations execute successfully"
+    ),
+)
+
+_SECURITY_TESTS = (
+    # Authority checks
+    TestCase(
+        name="test_unauthorized_access",
+        description="Test unauthorized access attempts",
+        test_code=_UNAUTHORIZED_ACCESS_TEST,
+        expected_result="Unauthorized access attempts are rejected"
+    ),
+)
+
+class SolanaTestGenerator:
+    def __init__(self, agent_config: Dict):
+        self.config = agent_config
+        self.load_prompts()
+    
+    def load_prompts(self):
+        prompts_path = os.path.join(BASE_DIR, 'code_assistance_module/prompts/prompts.json')
+        self.prompts = load_prompts_cached(prompts_path)
+        self._compiled_prompts = load_prompt_renderers(prompts_path)
+    
+    @memoize_by_source()
+    async def generate_tests(self, contract_code: str) -> List[TestCase]:
+        # Use AGiXT's Smart Instruct to generate tests
+        test_prompt = self._compiled_prompts['test_generation'](
+            contract_code=contract_code
+        )
+        
+        # Unit, integration and security tests are generated independently
+        unit_tests, integration_tests, security_tests = await asyncio.gather(
+            self._generate_unit_tests(contract_code),
+            self._generate_integration_tests(contract_code),
+            self._generate_security_tests(contract_code)
+        )
+        
+        return [*unit_tests, *integration_tests, *security_tests]
+    
+    async def _generate_unit_tests(self, contract_code: str) -> Tuple[TestCase, ...]:
+        # Generate unit tests for each public function
+        return _UNIT_TESTS
+    
+    async def _generate_integration_tests(self, contract_code: str) -> Tuple[TestCase, ...]:
+        # Generate integration tests
+        return _INTEGRATION_TESTS
+    
+    async def _generate_security_tests(self, contract_code: str) -> Tuple[TestCase, ...]:
+        # Generate security-focused tests
+        return _SECURITY_TESTS
+    
+    def _generate_init_test(self) -> str:
+        return _INIT_TEST
+    
+    def _generate_invalid_params_test(self) -> str:
+        return _INVALID_PARAMS_TEST
+    
+    def _generate_token_interaction_test(self) -> str:
+        return _TOKEN_INTERACTION_TEST
+    
+    def _generate_unauthorized_access_test(self) -> str:
+        return _UNAUTHORIZED_ACCESS_TEST
@@ -1,25 +1,58 @@
+import copy
 import json
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass
+from functools import cached_property, lru_cache
+from types import MappingProxyType
 import asyncio
 import logging
 from datetime import datetime
 
-@dataclass
+_TESTNET_GUIDE = MappingProxyType({
+    "setup": "solana config set --url https://api.devnet.solana.com",
+    "airdrop": "solana airdrop 2",
+    "deploy": "anchor deploy --provider.cluster devnet",
+    "verify": "solana confirm -v <SIGNATURE>",
+    "monitor": "solana logs <PROGRAM_ID>"
+})
+
+# (error context keyword, recommended tool) pairs, checked in order
+_DEBUG_RECOMMENDATIONS = (
+    ("Build", MappingProxyType({
+        "tool": "cargo-expand",
+        "description": "Expand Rust macros for debugging",
+        "installation": "cargo install cargo-expand",
+        "usage": "cargo expand"
+    })),
+    ("Runtime", MappingProxyType({
+        "tool": "solana-program-test",
+        "description": "Local testing environment",
+        "installation": "Built into Solana",
+        "usage": "Use in integration tests"
+    })),
+    ("Transaction", MappingProxyType({
+        "tool": "solana logs",
+        "description": "Monitor program logs",
+        "installation": "Part of Solana CLI",
+        "usage": "solana logs <PROGRAM_ID>"
+    }))
+)
+
+@dataclass(slots=True, frozen=True)
 class ToolchainCommand:
     command: str
     description: str
     usage_example: str
     context: str
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class EnvironmentConfig:
     component: str
     version: str
     configuration: Dict
     dependencies: List[str]
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class DeploymentStep:
     step_name: str
     commands: List[str]
@@ -29,14 +62,41 @@ class DeploymentStep:
 class ToolchainManager:
     def __init__(self, config_path: str):
         self.config = self._load_config(config_path)
-        self.cli_commands = self._initialize_cli_commands()
-        self.env_configs = self._initialize_env_configs()
-        self.deployment_workflows = self._initialize_deployment_workflows()
+        self._find_cli_command = lru_cache(maxsize=256)(self._scan_cli_commands)
+        # Environment probe results, kept until refresh_environment() is called
+        self._version_checks: Dict[Tuple[str, str], bool] = {}
+        self._dependency_checks: Dict[str, bool] = {}
         
     def _load_config(self, config_path: str) -> Dict:
         with open(config_path, 'r') as f:
             return json.load(f)
     
+    # Sub-structures are built on first access, so callers that only need
+    # one subsystem don't pay for the others
+    @cached_property
+    def cli_commands(self) -> Dict[str, ToolchainCommand]:
+        return self._initialize_cli_commands()
+    
+    @cached_property
+    def env_configs(self) -> Dict[str, EnvironmentConfig]:
+        return self._initialize_env_configs()
+    
+    @cached_property
+    def deployment_workflows(self) -> Dict[str, List[DeploymentStep]]:
+        return self._initialize_deployment_workflows()
+    
+    @cached_property
+    def _cli_index(self) -> List[Tuple[str, str, ToolchainCommand]]:
+        # Lowercased (context, description) pairs, built once instead of per query
+        return [
+            (cmd.context.lower(), cmd.description.lower(), cmd)
+            for cmd in self.cli_commands.values()
+        ]
+    
+    @cached_property
+    def _guidance_cache(self) -> Dict[str, List[Dict]]:
+        return self._build_deployment_guidance()
+    
     def _initialize_cli_commands(self) -> Dict[str, ToolchainCommand]:
         return {
             "init": ToolchainCommand(
@@ -122,18 +182,38 @@ class ToolchainManager:
     
     async def get_cli_assistance(self, context: str, action: str) -> Optional[ToolchainCommand]:
         # Find relevant CLI command based on context and action
-        for cmd in self.cli_commands.values():
-            if context.lower() in cmd.context.lower() and action.lower() in cmd.description.lower():
+        return self._find_cli_command(context.lower(), action.lower())
+    
+    def _scan_cli_commands(self, context: str, action: str) -> Optional[ToolchainCommand]:
+        for cmd_context, cmd_description, cmd in self._cli_index:
+            if context in cmd_context and action in cmd_description:
                 return cmd
         return None
     
     async def validate_environment(self) -> List[Dict[str, str]]:
         issues = []
         
+        # Probe every component version and every distinct dependency
+        # concurrently; shared dependencies are only checked once
+        components = list(self.env_configs.items())
+        dependencies = list(dict.fromkeys(
+            dep for config in self.env_configs.values() for dep in config.dependencies
+        ))
+        results = await asyncio.gather(
+            *(self._check_component_version(name, config.version) for name, config in components),
+            *(self._check_dependency(dep) for dep in dependencies),
+            return_exceptions=True
+        )
+        # A probe that raised counts as a failed check; any other result is
+        # judged by its truthiness
+        passed = [not isinstance(result, BaseException) and bool(result) for result in results]
+        version_ok = passed[:len(components)]
+        dependency_ok = dict(zip(dependencies, passed[len(components):]))
+        
         # Check each component
-        for name, config in self.env_configs.items():
+        for (name, config), version_matches in zip(components, version_ok):
             # Verify version
-            if not await self._check_component_version(name, config.version):
+            if not version_matches:
                 issues.append({
                     "component": name,
                     "issue": f"Version mismatch. Expected {config.version}",
@@ -142,7 +222,7 @@ class ToolchainManager:
             
             # Check dependencies
             for dep in config.dependencies:
-                if not await self._check_dependency(dep):
+                if not dependency_ok[dep]:
                     issues.append({
                         "component": name,
                         "issue": f"Missing dependency: {dep}",
@@ -152,64 +232,56 @@ class ToolchainManager:
         return issues
     
     async def get_deployment_guidance(self, deployment_type: str = "standard") -> List[Dict]:
-        workflow = self.deployment_workflows.get(f"{deployment_type}_deployment")
-        if not workflow:
-            return []
-        
-        guidance = []
-        for step in workflow:
-            guidance.append({
-                "step": step.step_name,
-                "commands": step.commands,
-                "validation": step.validation_checks,
-                "rollback": step.rollback_steps
-            })
-        
-        return guidance
+        # Hand out a copy so callers cannot change the guidance others receive
+        return copy.deepcopy(self._guidance_cache.get(f"{deployment_type}_deployment", []))
     
-    async def get_testnet_guide(self) -> Dict[str, str]:
+    def _build_deployment_guidance(self) -> Dict[str, List[Dict]]:
+        # Deployment workflows are static, so render their guidance once
         return {
-            "setup": "solana config set --url https://api.devnet.solana.com",
-            "airdrop": "solana airdrop 2",
-            "deploy": "anchor deploy --provider.cluster devnet",
-            "verify": "solana confirm -v <SIGNATURE>",
-            "monitor": "solana logs <PROGRAM_ID>"
+            name: [
+                {
+                    "step": step.step_name,
+                    "commands": step.commands,
+                    "validation": step.validation_checks,
+                    "rollback": step.rollback_steps
+                }
+                for step in workflow
+            ]
+            for name, workflow in self.deployment_workflows.items()
         }
     
+    async def get_testnet_guide(self) -> Dict[str, str]:
+        return dict(_TESTNET_GUIDE)
+    
     async def get_debug_recommendations(self, error_context: str) -> List[Dict[str, str]]:
-        recommendations = []
-        
-        if "Build" in error_context:
-            recommendations.append({
-                "tool": "cargo-expand",
-                "description": "Expand Rust macros for debugging",
-                "installation": "cargo install cargo-expand",
-                "usage": "cargo expand"
-            })
-        
-        if "Runtime" in error_context:
-            recommendations.append({
-                "tool": "solana-program-test",
-                "description": "Local testing environment",
-                "installation": "Built into Solana",
-                "usage": "Use in integration tests"
-            })
-        
-        if "Transaction" in error_context:
-            recommendations.append({
-                "tool": "solana logs",
-                "description": "Monitor program logs",
-                "installation": "Part of Solana CLI",
-                "usage": "solana logs <PROGRAM_ID>"
-            })
-        
-        return recommendations
+        # Copy the shared read-only records so results serialize like plain data
+        return [
+            dict(recommendation)
+            for keyword, recommendation in _DEBUG_RECOMMENDATIONS
+            if keyword in error_context
+        ]
+    
+    def refresh_environment(self):
+        # Forget cached probe results so the next validation re-checks the tools
+        self._version_checks.clear()
+        self._dependency_checks.clear()
     
     async def _check_component_version(self, component: str, expected_version: str) -> bool:
+        key = (component, expected_version)
+        if key not in self._version_checks:
+            self._version_checks[key] = await self._probe_component_version(component, expected_version)
+        return self._version_checks[key]
+    
+    async def _check_dependency(self, dependency: str) -> bool:
+        if dependency not in self._dependency_checks:
+            self._dependency_checks[dependency] = await self._probe_dependency(dependency)
+        return self._dependency_checks[dependency]
+    
+    async def _probe_component_version(self, component: str, expected_version: str) -> bool:
         # Implement version checking logic
         return True  # Placeholder
     
-    async def _check_dependency(self, dependency: str) -> bool:
+    async def _probe_dependency(self, dependency: str) -> bool:
         # Implement dependency checking logic
         return True  # Placeholder
     
@@ -1,89 +1,180 @@
-from typing import Dict, List, Optional
+from typing import Dict, List, Mapping, Optional, Tuple
 from dataclasses import dataclass
 import asyncio
+import heapq
 import logging
+import time
+import uuid
 from datetime import datetime
-import json
 
-@dataclass
+from ..json_utils import freeze_json, load_json
+
+# Result payload for each step of each chain, looked up by step name. The
+# payloads are frozen so every executed step can share the same instance
+_STEP_RESULTS: Mapping[str, Mapping[str, Mapping]] = freeze_json({
+    "initialization": {
+        "environment_check": {
+            "status": "checked",
+            "environment": {
+                "solana": "1.14.x",
+                "anchor": "0.27.x",
+                "rust": "1.69.x",
+                "node": "16.x"
+            }
+        },
+        "template_generation": {
+            "status": "generated",
+            "template": "token_contract",
+            "files": [
+                "Anchor.toml",
+                "Cargo.toml",
+                "src/lib.rs",
+                "tests/test.ts"
+            ]
+        },
+        "dependency_setup": {
+            "status": "configured",
+            "dependencies": {
+                "anchor-lang": "0.27.0",
+                "solana-program": "1.14.0",
+                "@solana/web3.js": "^1.75.0"
+            }
+        },
+        "initialization_commands": {
+            "status": "generated",
+            "commands": [
+                "anchor init my_token",
+                "cd my_token",
+                "anchor build",
+                "anchor test"
+            ]
+        }
+    },
+    "deployment": {
+        "code_review": {"status": "passed", "issues": []},
+        "test_validation": {"status": "passed", "test_results": "all tests passed"},
+        "deployment_preparation": {"status": "ready", "environment": "validated"},
+        "command_generation": {
+            "status": "generated",
+            "commands": [
+                "anchor build",
+                "anchor deploy --provider.cluster devnet"
+            ]
+        },
+        "deployment_verification": {"status": "verified", "deployment": "successful"}
+    },
+    "diagnostics": {
+        "error_collection": {
+            "status": "collected",
+            "errors": ["Error 1", "Error 2"]
+        },
+        "environment_check": {
+            "status": "checked",
+            "environment": {
+                "solana": "1.14.x",
+                "anchor": "0.27.x",
+                "rust": "1.69.x"
+            }
+        },
+        "log_analysis": {
+            "status": "analyzed",
+            "findings": ["Issue 1", "Issue 2"]
+        },
+        "solution_recommendation": {
+            "status": "recommended",
+            "solutions": ["Solution 1", "Solution 2"]
+        }
+    }
+})
+
+def _plan_waves(steps_config: List[Dict]) -> List[List[int]]:
+    # Group step indices into waves whose dependencies all ran in earlier waves.
+    # A step without depends_on waits for the step listed before it
+    names = [step_config['name'] for step_config in steps_config]
+    positions = {name: i for i, name in enumerate(names)}
+    dependencies = []
+    for i, step_config in enumerate(steps_config):
+        depends_on = step_config.get('depends_on', names[i - 1:i])
+        unknown = [name for name in depends_on if name not in positions]
+        if unknown:
+            raise ValueError(f"Step {names[i]} depends on unknown steps {unknown}")
+        dependencies.append({positions[name] for name in depends_on})
+    
+    waves = []
+    done = set()
+    pending = list(range(len(steps_config)))
+    while pending:
+        wave = [i for i in pending if dependencies[i] <= done]
+        if not wave:
+            raise ValueError(f"Circular step dependencies among {[names[i] for i in pending]}")
+        waves.append(wave)
+        done.update(wave)
+        pending = [i for i in pending if i not in done]
+    return waves
+
+@dataclass(slots=True)
 class WorkflowStep:
     name: str
     type: str
     required: bool
     status: str = "pending"
-    result: Optional[Dict] = None
+    result: Optional[Mapping] = None
 
-@dataclass
+@dataclass(slots=True)
 class WorkflowChain:
     name: str
     steps: List[WorkflowStep]
     start_time: datetime
     end_time: Optional[datetime] = None
     status: str = "pending"
+    # Monotonic clock reading taken alongside end_time, used for age checks
+    end_time_mono: Optional[float] = None
 
 class WorkflowChainManager:
     def __init__(self, config_path: str):
         self.config = self._load_config(config_path)
         self.active_chains: Dict[str, WorkflowChain] = {}
+        # Min-heap of (end_time_mono, chain_id) for finished chains, oldest first
+        self._completion_heap: List[Tuple[float, str]] = []
+        # Step definitions flattened once so creating a chain skips the config traversal
+        self._step_templates: Dict[str, List[Tuple[str, str, bool]]] = {
+            name: [(s['name'], s['type'], s['required']) for s in chain_config['steps']]
+            for name, chain_config in self.config['workflow_chains'].items()
+        }
+        # Steps of the same wave do not depend on each other and run concurrently
+        self._step_waves: Dict[str, List[List[int]]] = {
+            name: _plan_waves(chain_config['steps'])
+            for name, chain_config in self.config['workflow_chains'].items()
+        }
     
     def _load_config(self, config_path: str) -> Dict:
-        with open(config_path, 'r') as f:
-            return json.load(f)
+        with open(config_path, 'rb') as f:
+            data = f.read()
+        return load_json(data)
     
     async def create_initialization_chain(self) -> str:
         """Create a new project initialization workflow chain"""
-        chain_id = f"init_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-        
-        steps = []
-        for step_config in self.config['workflow_chains']['initialization']['steps']:
-            steps.append(WorkflowStep(
-                name=step_config['name'],
-                type=step_config['type'],
-                required=step_config['required']
-            ))
-        
-        self.active_chains[chain_id] = WorkflowChain(
-            name="initialization",
-            steps=steps,
-            start_time=datetime.now()
-        )
-        
-        return chain_id
+        return self._make_chain("initialization", "init")
 
     async def create_deployment_chain(self) -> str:
         """Create a new deployment workflow chain"""
-        chain_id = f"deploy_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-        
-        steps = []
-        for step_config in self.config['workflow_chains']['deployment']['steps']:
-            steps.append(WorkflowStep(
-                name=step_config['name'],
-                type=step_config['type'],
-                required=step_config['required']
-            ))
-        
-        self.active_chains[chain_id] = WorkflowChain(
-            name="deployment",
-            steps=steps,
-            start_time=datetime.now()
-        )
-        
-        return chain_id
+        return self._make_chain("deployment", "deploy")
     
     async def create_diagnostic_chain(self) -> str:
         """Create a new diagnostic workflow chain"""
-        chain_id = f"diag_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        return self._make_chain("diagnostics", "diag")
+    
+    def _make_chain(self, kind: str, prefix: str) -> str:
+        # Random ids stay unique even for chains created within the same second
+        chain_id = f"{prefix}_{uuid.uuid4().hex[:12]}"
         
-        steps = []
-        for step_config in self.config['workflow_chains']['diagnostics']['steps']:
-            steps.append(WorkflowStep(
-                name=step_config['name'],
-                type=step_config['type'],
-                required=step_config['required']
-            ))
+        steps = [
+            WorkflowStep(name=name, type=step_type, required=required)
+            for name, step_type, required in self._step_templates[kind]
+        ]
         
         self.active_chains[chain_id] = WorkflowChain(
-            name="diagnostics",
+            name=kind,
             steps=steps,
             start_time=datetime.now()
         )
@@ -98,172 +189,44 @@ class WorkflowChainManager:
         chain = self.active_chains[chain_id]
         
         try:
-            for step in chain.steps:
-                if not await self._execute_step(chain.name, step):
-                    chain.status = "failed"
-                    chain.end_time = datetime.now()
+            for wave in self._step_waves[chain.name]:
+                steps = [chain.steps[i] for i in wave]
+                results = await asyncio.gather(*(self._execute_step(chain.name, step) for step in steps))
+                # Only a failed required step stops the chain
+                if any(step.required and not result for step, result in zip(steps, results)):
+                    self._finish_chain(chain_id, chain, "failed")
                     return False
             
-            chain.status = "completed"
-            chain.end_time = datetime.now()
+            self._finish_chain(chain_id, chain, "completed")
             return True
             
         except Exception as e:
             logging.error(f"Error executing chain {chain_id}: {str(e)}")
-            chain.status = "failed"
-            chain.end_time = datetime.now()
+            self._finish_chain(chain_id, chain, "failed")
             return False
     
+    def _finish_chain(self, chain_id: str, chain: WorkflowChain, status: str):
+        chain.status = status
+        chain.end_time = datetime.now()
+        chain.end_time_mono = time.monotonic()
+        heapq.heappush(self._completion_heap, (chain.end_time_mono, chain_id))
+    
     async def _execute_step(self, chain_name: str, step: WorkflowStep) -> bool:
         """Execute a single workflow step"""
         try:
-            if chain_name == "initialization":
-                result = await self._execute_initialization_step(step)
-            elif chain_name == "deployment":
-                result = await self._execute_deployment_step(step)
-            else:  # diagnostics
-                result = await self._execute_diagnostic_step(step)
+            result = _STEP_RESULTS[chain_name].get(step.name)
+            if result is None:
+                step.status = "failed"
+                return False
             
-            step.status = "completed" if result else "failed"
-            return result
+            step.result = result
+            step.status = "completed"
+            return True
             
         except Exception as e:
             logging.error(f"Error executing step {step.name}: {str(e)}")
             step.status = "failed"
             return False
-
-    async def _execute_initialization_step(self, step: WorkflowStep) -> bool:
-        """Execute an initialization workflow step"""
-        try:
-            if step.name == "environment_check":
-                # Check development environment
-                step.result = {
-                    "status": "checked",
-                    "environment": {
-                        "solana": "1.14.x",
-                        "anchor": "0.27.x",
-                        "rust": "1.69.x",
-                        "node": "16.x"
-                    }
-                }
-                return True
-            elif step.name == "template_generation":
-                # Generate project template
-                step.result = {
-                    "status": "generated",
-                    "template": "token_contract",
-                    "files": [
-                        "Anchor.toml",
-                        "Cargo.toml",
-                        "src/lib.rs",
-                        "tests/test.ts"
-                    ]
-                }
-                return True
-            elif step.name == "dependency_setup":
-                # Set up project dependencies
-                step.result = {
-                    "status": "configured",
-                    "dependencies": {
-                        "anchor-lang": "0.27.0",
-                        "solana-program": "1.14.0",
-                        "@solana/web3.js": "^1.75.0"
-                    }
-                }
-                return True
-            elif step.name == "initialization_commands":
-                # Generate initialization commands
-                step.result = {
-                    "status": "generated",
-                    "commands": [
-                        "anchor init my_token",
-                        "cd my_token",
-                        "anchor build",
-                        "anchor test"
-                    ]
-                }
-                return True
-            return False
-        except Exception as e:
-            logging.error(f"Error in initialization step {step.name}: {str(e)}")
-            step.result = {"status": "failed", "error": str(e)}
-            return False
-    
-    async def _execute_deployment_step(self, step: WorkflowStep) -> bool:
-        """Execute a deployment workflow step"""
-        try:
-            if step.name == "code_review":
-                # Implement code review logic
-                step.result = {"status": "passed", "issues": []}
-                return True
-            elif step.name == "test_validation":
-                # Implement test validation logic
-                step.result = {"status": "passed", "test_results": "all tests passed"}
-                return True
-            elif step.name == "deployment_preparation":
-                # Implement deployment preparation logic
-                step.result = {"status": "ready", "environment": "validated"}
-                return True
-            elif step.name == "command_generation":
-                # Implement command generation logic
-                step.result = {
-                    "status": "generated",
-                    "commands": [
-                        "anchor build",
-                        "anchor deploy --provider.cluster devnet"
-                    ]
-                }
-                return True
-            elif step.name == "deployment_verification":
-                # Implement deployment verification logic
-                step.result = {"status": "verified", "deployment": "successful"}
-                return True
-            return False
-        except Exception as e:
-            logging.error(f"Error in deployment step {step.name}: {str(e)}")
-            step.result = {"status": "failed", "error": str(e)}
-            return False
-    
-    async def _execute_diagnostic_step(self, step: WorkflowStep) -> bool:
-        """Execute a diagnostic workflow step"""
-        try:
-            if step.name == "error_collection":
-                # Implement error collection logic
-                step.result = {
-                    "status": "collected",
-                    "errors": ["Error 1", "Error 2"]
-                }
-                return True
-            elif step.name == "environment_check":
-                # Implement environment check logic
-                step.result = {
-                    "status": "checked",
-                    "environment": {
-                        "solana": "1.14.x",
-                        "anchor": "0.27.x",
-                        "rust": "1.69.x"
-                    }
-                }
-                return True
-            elif step.name == "log_analysis":
-                # Implement log analysis logic
-                step.result = {
-                    "status": "analyzed",
-                    "findings": ["Issue 1", "Issue 2"]
-                }
-                return True
-            elif step.name == "solution_recommendation":
-                # Implement solution recommendation logic
-                step.result = {
-                    "status": "recommended",
-                    "solutions": ["Solution 1", "Solution 2"]
-                }
-                return True
-            return False
-        except Exception as e:
-            logging.error(f"Error in diagnostic step {step.name}: {str(e)}")
-            step.result = {"status": "failed", "error": str(e)}
-            return False
     
     def get_chain_status(self, chain_id: str) -> Dict:
         """Get the status of a workflow chain"""
@@ -289,14 +252,11 @@ class WorkflowChainManager:
     
     async def cleanup_completed_chains(self, max_age_hours: int = 24):
         """Clean up completed chains older than specified hours"""
-        current_time = datetime.now()
-        chains_to_remove = []
-        
-        for chain_id, chain in self.active_chains.items():
-            if chain.end_time:
-                age = current_time - chain.end_time
-                if age.total_seconds() > max_age_hours * 3600:
-                    chains_to_remove.append(chain_id)
-        
-        for chain_id in chains_to_remove:
-            del self.active_chains[chain_id]
+        cutoff = time.monotonic() - max_age_hours * 3600
+        heap = self._completion_heap
+        while heap and heap[0][0] < cutoff:
+            end_time_mono, chain_id = heapq.heappop(heap)
+            # Skip entries for chains already removed or finished again since
+            chain = self.active_chains.get(chain_id)
+            if chain is not None and chain.end_time_mono == end_time_mono:
+                del self.active_chains[chain_id]
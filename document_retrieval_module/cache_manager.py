@@ -1,26 +1,93 @@
 import json
 import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
 from typing import Dict, Any, Optional
-from datetime import datetime, timedelta
-import aiofiles
 import asyncio
 import logging
 
+from ..json_utils import dump_json, load_json
+
+_MISS = object()
+
+@dataclass(slots=True, frozen=True)
+class CacheSettings:
+    ttl_seconds: float
+    cleanup_interval: float
+    max_size_bytes: int
+    mem_entries: int
+    
+    @classmethod
+    def from_config(cls, config: Dict) -> "CacheSettings":
+        settings = config['cache_settings']
+        return cls(
+            ttl_seconds=settings['ttl_hours'] * 3600,
+            cleanup_interval=settings['cleanup_interval'],
+            max_size_bytes=settings['max_size_mb'] * 1024 * 1024,
+            mem_entries=settings.get('mem_entries', 1024)
+        )
+
 class DocumentCache:
-    def __init__(self, config_path: str):
+    def __init__(self, config_path: str, cache_dir: Optional[str] = None):
         self.config = self._load_config(config_path)
-        self.cache_dir = os.path.join(os.path.dirname(__file__), "cache")
+        # Settings read on hot paths, parsed once from the raw config
+        self.settings = CacheSettings.from_config(self.config)
+        self.cache_dir = cache_dir or os.path.join(os.path.dirname(__file__), "cache")
         self.ensure_cache_directory()
+        self.db_path = os.path.join(self.cache_dir, "cache.sqlite3")
+        # One shared connection; calls run in worker threads, serialized by the lock
+        self._db = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        self._db_lock = threading.Lock()
+        self._initialize_database()
+        # Hot entries served without touching the database: key -> (expires_at, payload).
+        # The serialized payload is kept and decoded per hit, so no two callers
+        # ever share a content object
+        self._mem: OrderedDict = OrderedDict()
+        self._mem_max_entries = self.settings.mem_entries
+        # Concurrent misses on the same key queue on one shard lock, so only
+        # the first of them reads the database
+        self._read_locks = [asyncio.Lock() for _ in range(16)]
         self.cleanup_task = None
-        
+    
     def _load_config(self, config_path: str) -> Dict:
-        with open(config_path, 'r') as f:
-            return json.load(f)
+        with open(config_path, 'rb') as f:
+            data = f.read()
+        return load_json(data)
     
     def ensure_cache_directory(self):
         if not os.path.exists(self.cache_dir):
             os.makedirs(self.cache_dir)
     
+    def _initialize_database(self):
+        with self._db_lock:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, "
+                "payload BLOB NOT NULL, "
+                "created_at REAL NOT NULL, "
+                "expires_at REAL NOT NULL, "
+                "size INTEGER NOT NULL)"
+            )
+            # Expiry sweeps and oldest-first eviction are index range scans
+            self._db.execute("CREATE INDEX IF NOT EXISTS entries_expires_at ON entries (expires_at)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS entries_created_at ON entries (created_at)")
+    
+    def _execute(self, sql: str, params: tuple = ()) -> list:
+        with self._db_lock:
+            return self._db.execute(sql, params).fetchall()
+    
+    async def _run(self, sql: str, params: tuple = ()) -> list:
+        return await asyncio.to_thread(self._execute, sql, params)
+    
+    def close(self):
+        with self._db_lock:
+            self._db.close()
+    
     async def start_cleanup_task(self):
         if self.cleanup_task is None:
             self.cleanup_task = asyncio.create_task(self._periodic_cleanup())
@@ -35,57 +102,92 @@ class DocumentCache:
             self.cleanup_task = None
     
     async def get(self, key: str) -> Optional[Dict]:
-        cache_file = os.path.join(self.cache_dir, f"{key}.json")
+        content = self._get_from_memory(key)
+        if content is not _MISS:
+            return content
+        
+        async with self._read_locks[hash(key) % len(self._read_locks)]:
+            # Another reader may have loaded the entry while we waited
+            content = self._get_from_memory(key)
+            if content is not _MISS:
+                return content
+            return await self._read_entry(key)
+    
+    async def _read_entry(self, key: str) -> Optional[Dict]:
         try:
-            async with aiofiles.open(cache_file, 'r') as f:
-                content = await f.read()
-                data = json.loads(content)
-                
-                # Check if cache entry is still valid
-                if self._is_cache_valid(data):
-                    return data['content']
-                else:
-                    await self.delete(key)
-                    return None
-        except (FileNotFoundError, json.JSONDecodeError):
+            rows = await self._run("SELECT payload FROM entries WHERE key = ?", (key,))
+            if not rows:
+                return None
+            payload = rows[0][0]
+            data = load_json(payload)
+            
+            # Check if cache entry is still valid
+            if self._is_cache_valid(data):
+                self._remember(key, data['timestamp'] + data['ttl_seconds'], payload)
+                return data['content']
+            else:
+                await self.delete(key)
+                return None
+        except (sqlite3.Error, json.JSONDecodeError, KeyError, TypeError) as e:
+            logging.error(f"Failed to read cache entry {key}: {str(e)}")
             return None
     
+    def _get_from_memory(self, key: str) -> Any:
+        entry = self._mem.get(key)
+        if entry is None:
+            return _MISS
+        expires_at, payload = entry
+        if time.time() >= expires_at:
+            del self._mem[key]
+            return _MISS
+        self._mem.move_to_end(key)
+        return load_json(payload)['content']
+    
+    def _remember(self, key: str, expires_at: float, payload: bytes):
+        self._mem[key] = (expires_at, payload)
+        self._mem.move_to_end(key)
+        if len(self._mem) > self._mem_max_entries:
+            self._mem.popitem(last=False)
+    
     async def set(self, key: str, value: Any):
-        cache_file = os.path.join(self.cache_dir, f"{key}.json")
+        now = time.time()
+        ttl_seconds = self.settings.ttl_seconds
         cache_data = {
             'content': value,
-            'timestamp': datetime.now().isoformat(),
-            'ttl': self.config['cache_settings']['ttl_hours']
+            'timestamp': now,
+            'ttl_seconds': ttl_seconds
         }
         
         try:
-            async with aiofiles.open(cache_file, 'w') as f:
-                await f.write(json.dumps(cache_data))
+            payload = dump_json(cache_data)
+            expires_at = now + ttl_seconds
+            await self._run(
+                "INSERT OR REPLACE INTO entries (key, payload, created_at, expires_at, size) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, payload, now, expires_at, len(payload))
+            )
+            # Keep what was stored, not the caller's object, so later changes
+            # to value cannot leak into memory hits
+            self._remember(key, expires_at, payload)
         except Exception as e:
-            logging.error(f"Failed to write cache file {cache_file}: {str(e)}")
+            logging.error(f"Failed to write cache entry {key}: {str(e)}")
     
     async def delete(self, key: str):
-        cache_file = os.path.join(self.cache_dir, f"{key}.json")
-        try:
-            os.remove(cache_file)
-        except FileNotFoundError:
-            pass
+        self._mem.pop(key, None)
+        await self._run("DELETE FROM entries WHERE key = ?", (key,))
     
     async def clear(self):
-        for filename in os.listdir(self.cache_dir):
-            if filename.endswith('.json'):
-                await self.delete(filename[:-5])
+        self._mem.clear()
+        await self._run("DELETE FROM entries")
     
     def _is_cache_valid(self, cache_data: Dict) -> bool:
-        timestamp = datetime.fromisoformat(cache_data['timestamp'])
-        ttl_hours = cache_data['ttl']
-        return datetime.now() - timestamp < timedelta(hours=ttl_hours)
+        return time.time() - cache_data['timestamp'] < cache_data['ttl_seconds']
     
     async def _periodic_cleanup(self):
         while True:
             try:
                 await self._cleanup_expired_entries()
-                await asyncio.sleep(self.config['cache_settings']['cleanup_interval'])
+                await asyncio.sleep(self.settings.cleanup_interval)
             except asyncio.CancelledError:
                 break
             except Exception as e:
@@ -93,53 +195,31 @@ class DocumentCache:
                 await asyncio.sleep(60)  # Wait before retrying
     
     async def _cleanup_expired_entries(self):
-        for filename in os.listdir(self.cache_dir):
-            if not filename.endswith('.json'):
-                continue
-                
-            cache_file = os.path.join(self.cache_dir, filename)
-            try:
-                async with aiofiles.open(cache_file, 'r') as f:
-                    content = await f.read()
-                    data = json.loads(content)
-                    
-                    if not self._is_cache_valid(data):
-                        await self.delete(filename[:-5])
-            except Exception as e:
-                logging.error(f"Error processing cache file {filename}: {str(e)}")
+        # Expired entries form a prefix of the expires_at index
+        await self._run("DELETE FROM entries WHERE expires_at <= ?", (time.time(),))
     
     async def get_cache_size(self) -> int:
-        total_size = 0
-        for filename in os.listdir(self.cache_dir):
-            if filename.endswith('.json'):
-                file_path = os.path.join(self.cache_dir, filename)
-                total_size += os.path.getsize(file_path)
-        return total_size
+        rows = await self._run("SELECT COALESCE(SUM(size), 0) FROM entries")
+        return rows[0][0]
     
     async def ensure_cache_size_limit(self):
-        max_size = self.config['cache_settings']['max_size_mb'] * 1024 * 1024
+        max_size = self.settings.max_size_bytes
         current_size = await self.get_cache_size()
         
         if current_size > max_size:
             # Remove oldest entries until under limit
-            cache_files = []
-            for filename in os.listdir(self.cache_dir):
-                if filename.endswith('.json'):
-                    file_path = os.path.join(self.cache_dir, filename)
-                    cache_files.append((
-                        filename,
-                        os.path.getmtime(file_path)
-                    ))
-            
-            # Sort by modification time (oldest first)
-            cache_files.sort(key=lambda x: x[1])
-            
-            # Remove files until under limit
-            for filename, _ in cache_files:
+            rows = await self._run("SELECT key, size FROM entries ORDER BY created_at")
+            stale_keys = []
+            for key, size in rows:
                 if current_size <= max_size:
                     break
-                    
-                file_path = os.path.join(self.cache_dir, filename)
-                file_size = os.path.getsize(file_path)
-                await self.delete(filename[:-5])
-                current_size -= file_size
+                stale_keys.append(key)
+                current_size -= size
+            
+            for key in stale_keys:
+                self._mem.pop(key, None)
+            await asyncio.to_thread(self._delete_many, stale_keys)
+    
+    def _delete_many(self, keys: list):
+        with self._db_lock:
+            self._db.executemany("DELETE FROM entries WHERE key = ?", ((key,) for key in keys))
@@ -1,19 +1,36 @@
 import json
-from typing import Dict, List, Optional
-from dataclasses import dataclass
+from collections import OrderedDict
+from functools import lru_cache
+from itertools import chain
+from operator import itemgetter
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+from dataclasses import dataclass, field
 import aiohttp
 import asyncio
 from datetime import datetime, timedelta
 
-@dataclass
+@lru_cache(maxsize=1024)
+def _parse_timestamp(value: str) -> datetime:
+    # Results from one source tend to share timestamps, so parsed values are
+    # cached; an item without one sorts as oldest instead of failing the parse
+    return datetime.fromisoformat(value) if value else datetime.min
+
+@dataclass(slots=True)
 class DocumentReference:
     title: str
     content: str
     url: str
     last_updated: datetime
     category: str
+    # Lowercased word sets used for relevance scoring, computed once per document
+    _title_tokens: FrozenSet[str] = field(init=False, repr=False, compare=False)
+    _content_tokens: FrozenSet[str] = field(init=False, repr=False, compare=False)
+    
+    def __post_init__(self):
+        self._title_tokens = frozenset(self.title.lower().split())
+        self._content_tokens = frozenset(self.content.lower().split())
 
-@dataclass
+@dataclass(slots=True)
 class SearchResult:
     references: List[DocumentReference]
     relevance_score: float
@@ -22,8 +39,12 @@ class SearchResult:
 class SolanaDocumentRetriever:
     def __init__(self, agent_config: Dict):
         self.config = agent_config
-        self.cache = {}
+        # Bounded LRU of recent search results
+        self.cache: OrderedDict = OrderedDict()
+        self.cache_max_entries = 1024
         self.cache_ttl = timedelta(hours=24)
+        # Searches currently running, so concurrent identical queries share one
+        self._inflight: Dict[Tuple[Optional[str], str], asyncio.Future] = {}
         self.doc_sources = {
             "solana": "https://docs.solana.com",
             "anchor": "https://docs.rs/anchor-lang",
@@ -32,32 +53,52 @@ class SolanaDocumentRetriever:
     
     async def query_documentation(self, query: str, category: Optional[str] = None) -> SearchResult:
         # Check cache first
-        cache_key = f"{category}:{query}" if category else query
-        if cache_key in self.cache:
-            cached_result = self.cache[cache_key]
+        cache_key = (category, query)
+        cached_result = self.cache.get(cache_key)
+        if cached_result is not None:
             if datetime.now() - cached_result.timestamp < self.cache_ttl:
+                self.cache.move_to_end(cache_key)
                 return cached_result
+            del self.cache[cache_key]
         
+        # Join a search for the same key that is already running. Every caller,
+        # the one that started it included, awaits it through a shield, so a
+        # cancelled caller never cancels the search for the others
+        search = self._inflight.get(cache_key)
+        if search is None:
+            search = asyncio.ensure_future(self._search_and_cache(cache_key, query, category))
+            self._inflight[cache_key] = search
+            search.add_done_callback(lambda _: self._inflight.pop(cache_key, None))
+        return await asyncio.shield(search)
+    
+    async def _search_and_cache(self, cache_key: Tuple[Optional[str], str], query: str,
+                                category: Optional[str]) -> SearchResult:
+        search_result = await self._search(query, category)
+        
+        # Cache the result
+        self.cache[cache_key] = search_result
+        if len(self.cache) > self.cache_max_entries:
+            self.cache.popitem(last=False)
+        return search_result
+    
+    async def _search(self, query: str, category: Optional[str]) -> SearchResult:
         # Perform documentation search based on category
         if category == "solana":
-            results = await self._search_solana_docs(query)
+            scored = self._score_references(query, await self._search_solana_docs(query))
         elif category == "anchor":
-            results = await self._search_anchor_docs(query)
+            scored = self._score_references(query, await self._search_anchor_docs(query))
         elif category == "spl":
-            results = await self._search_spl_docs(query)
+            scored = self._score_references(query, await self._search_spl_docs(query))
         else:
             # Search all documentation sources
-            results = await self._search_all_docs(query)
+            scored = await self._search_all_docs(query)
         
-        search_result = SearchResult(
-            references=results,
-            relevance_score=self._calculate_relevance(query, results),
+        # Every reference is scored once; the overall relevance is the mean score
+        return SearchResult(
+            references=[ref for _, ref in scored],
+            relevance_score=sum(score for score, _ in scored) / len(scored) if scored else 0.0,
             timestamp=datetime.now()
         )
-        
-        # Cache the result
-        self.cache[cache_key] = search_result
-        return search_result
     
     async def get_best_practices(self, topic: str) -> List[DocumentReference]:
         # Query best practices documentation
@@ -136,7 +177,7 @@ class SolanaDocumentRetriever:
             )
         ]
     
-    async def _search_all_docs(self, query: str) -> List[DocumentReference]:
+    async def _search_all_docs(self, query: str) -> List[Tuple[float, DocumentReference]]:
         # Search all documentation sources concurrently
         tasks = [
             self._search_solana_docs(query),
@@ -145,72 +186,45 @@ class SolanaDocumentRetriever:
         ]
         results = await asyncio.gather(*tasks)
         # Combine and sort results by relevance
-        combined_results = []
-        for result_list in results:
-            combined_results.extend(result_list)
-        return sorted(combined_results, 
-                     key=lambda x: self._calculate_doc_relevance(query, x),
-                     reverse=True)
+        scored = self._score_references(query, chain.from_iterable(results))
+        scored.sort(key=itemgetter(0), reverse=True)
+        return scored
     
     def _parse_solana_results(self, data: Dict) -> List[DocumentReference]:
         # Parse Solana documentation search results
-        references = []
-        for item in data.get("items", []):
-            references.append(DocumentReference(
-                title=item.get("title", ""),
-                content=item.get("content", ""),
-                url=item.get("url", ""),
-                last_updated=datetime.fromisoformat(item.get("last_updated", "")),
-                category="solana"
-            ))
-        return references
+        return [self._parse_item(item, "solana") for item in data.get("items", [])]
     
     def _parse_anchor_results(self, data: Dict) -> List[DocumentReference]:
         # Parse Anchor documentation search results
-        references = []
-        for item in data.get("items", []):
-            references.append(DocumentReference(
-                title=item.get("title", ""),
-                content=item.get("content", ""),
-                url=item.get("url", ""),
-                last_updated=datetime.fromisoformat(item.get("last_updated", "")),
-                category="anchor"
-            ))
-        return references
+        return [self._parse_item(item, "anchor") for item in data.get("items", [])]
     
     def _parse_spl_results(self, data: Dict) -> List[DocumentReference]:
         # Parse SPL documentation search results
-        references = []
-        for item in data.get("items", []):
-            references.append(DocumentReference(
-                title=item.get("title", ""),
-                content=item.get("content", ""),
-                url=item.get("url", ""),
-                last_updated=datetime.fromisoformat(item.get("last_updated", "")),
-                category="spl"
-            ))
-        return references
+        return [self._parse_item(item, "spl") for item in data.get("items", [])]
     
-    def _calculate_relevance(self, query: str, references: List[DocumentReference]) -> float:
-        # Calculate overall relevance score for search results
-        if not references:
-            return 0.0
-        
-        total_score = sum(self._calculate_doc_relevance(query, ref) 
-                         for ref in references)
-        return total_score / len(references)
+    def _parse_item(self, item: Dict, category: str) -> DocumentReference:
+        return DocumentReference(
+            title=item.get("title", ""),
+            content=item.get("content", ""),
+            url=item.get("url", ""),
+            last_updated=_parse_timestamp(item.get("last_updated", "")),
+            category=category
+        )
+    
+    def _score_references(self, query: str, references: Iterable[DocumentReference]) -> List[Tuple[float, DocumentReference]]:
+        # Pair each reference with its relevance score; the query is tokenized once
+        query_terms = frozenset(query.lower().split())
+        if not query_terms:
+            return [(0.0, ref) for ref in references]
+        return [(self._calculate_doc_relevance(query_terms, ref), ref) for ref in references]
     
-    def _calculate_doc_relevance(self, query: str, doc: DocumentReference) -> float:
+    def _calculate_doc_relevance(self, query_terms: FrozenSet[str], doc: DocumentReference) -> float:
         # Calculate relevance score for individual document
-        query_terms = set(query.lower().split())
-        content_terms = set(doc.content.lower().split())
-        title_terms = set(doc.title.lower().split())
-        
-        content_match = len(query_terms & content_terms) / len(query_terms)
-        title_match = len(query_terms & title_terms) / len(query_terms)
-        
-        # Weight title matches more heavily
-        return (0.7 * title_match) + (0.3 * content_match)
+        # Set intersection runs in C and beats a Python-level counting loop
+        # for these short term sets; weight title matches more heavily
+        title_hits = len(query_terms & doc._title_tokens)
+        content_hits = len(query_terms & doc._content_tokens)
+        return (0.7 * title_hits + 0.3 * content_hits) / len(query_terms)
     
     def _is_best_practice(self, doc: DocumentReference) -> bool:
         # Determine if document is a best practice guide
@@ -1,14 +1,40 @@
-import json
-from typing import Dict, List, Set, Optional
+from collections import Counter, defaultdict
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, Set, Optional
 from dataclasses import dataclass
-import aiofiles
 import asyncio
+import heapq
 import logging
 from datetime import datetime
 
-@dataclass
+from ..json_utils import load_json
+
+# Punctuation is deleted from the whole text in one pass before splitting
+_PUNCT_TABLE = str.maketrans('', '', '.,!?()[]{}')
+_STOP_WORDS = frozenset({'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for'})
+
+def _tokenize(text: str) -> FrozenSet[str]:
+    return frozenset(word for word in text.lower().translate(_PUNCT_TABLE).split() if word not in _STOP_WORDS)
+
+# Queries repeat far more often than documents are indexed, so only they are cached
+_query_keywords = lru_cache(maxsize=1024)(_tokenize)
+
+@dataclass(slots=True, frozen=True)
+class SearchSettings:
+    max_results: int
+    min_relevance_score: float
+    
+    @classmethod
+    def from_config(cls, config: Dict) -> "SearchSettings":
+        settings = config['search_settings']
+        return cls(
+            max_results=settings['max_results'],
+            min_relevance_score=settings['min_relevance_score']
+        )
+
+@dataclass(slots=True)
 class DocumentIndex:
-    keywords: Set[str]
+    keywords: FrozenSet[str]
     category: str
     last_updated: datetime
     relevance: float
@@ -17,12 +43,17 @@ class DocumentIndex:
 class IndexManager:
     def __init__(self, config_path: str):
         self.config = self._load_config(config_path)
+        self.settings = SearchSettings.from_config(self.config)
         self.indices: Dict[str, DocumentIndex] = {}
+        # Inverted index: keyword -> ids of the documents containing it
+        self._postings: Dict[str, Set[str]] = defaultdict(set)
+        self._by_category: Dict[str, Set[str]] = defaultdict(set)
         self.update_task = None
     
     def _load_config(self, config_path: str) -> Dict:
-        with open(config_path, 'r') as f:
-            return json.load(f)
+        with open(config_path, 'rb') as f:
+            data = f.read()
+        return load_json(data)
     
     async def start_update_task(self):
         if self.update_task is None:
@@ -40,6 +71,7 @@ class IndexManager:
     async def index_document(self, doc_id: str, content: str, category: str):
         # Extract keywords and create index
         keywords = self._extract_keywords(content)
+        self._unindex_document(doc_id)
         self.indices[doc_id] = DocumentIndex(
             keywords=keywords,
             category=category,
@@ -47,37 +79,50 @@ class IndexManager:
             relevance=1.0,
             document_id=doc_id
         )
+        for keyword in keywords:
+            self._postings[keyword].add(doc_id)
+        self._by_category[category].add(doc_id)
+    
+    def _unindex_document(self, doc_id: str):
+        # Drop a previously indexed version of the document from the postings
+        index = self.indices.pop(doc_id, None)
+        if index is None:
+            return
+        for keyword in index.keywords:
+            postings = self._postings[keyword]
+            postings.discard(doc_id)
+            if not postings:
+                del self._postings[keyword]
+        self._by_category[index.category].discard(doc_id)
     
     async def search(self, query: str, category: Optional[str] = None) -> List[str]:
-        query_keywords = self._extract_keywords(query)
-        results = []
+        query_keywords = _query_keywords(query)
+        if not query_keywords:
+            return []
         
-        for doc_id, index in self.indices.items():
-            if category and index.category != category:
+        # Walking the postings of each query keyword counts, per document, how
+        # many keywords it shares with the query; unrelated documents are never visited
+        hits = Counter()
+        for keyword in query_keywords:
+            hits.update(self._postings.get(keyword, ()))
+        
+        in_category = self._by_category.get(category, set()) if category else None
+        min_relevance = self.settings.min_relevance_score
+        results = []
+        for doc_id, count in hits.items():
+            if in_category is not None and doc_id not in in_category:
                 continue
-            
-            # Calculate relevance score
-            relevance = self._calculate_relevance(query_keywords, index.keywords)
-            if relevance >= self.config['search_settings']['min_relevance_score']:
+            relevance = count / len(query_keywords)
+            if relevance >= min_relevance:
                 results.append((doc_id, relevance))
         
-        # Sort by relevance and return document IDs
-        results.sort(key=lambda x: x[1], reverse=True)
-        return [doc_id for doc_id, _ in results[:self.config['search_settings']['max_results']]]
+        # Select the top results by relevance (ties by document ID) without sorting them all
+        top = heapq.nsmallest(self.settings.max_results, results, key=lambda x: (-x[1], x[0]))
+        return [doc_id for doc_id, _ in top]
     
-    def _extract_keywords(self, text: str) -> Set[str]:
+    def _extract_keywords(self, text: str) -> FrozenSet[str]:
         # Simple keyword extraction (can be enhanced with NLP)
-        words = text.lower().split()
-        # Remove common words and punctuation
-        stop_words = {'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for'}
-        return {word.strip('.,!?()[]{}') for word in words if word not in stop_words}
-    
-    def _calculate_relevance(self, query_keywords: Set[str], doc_keywords: Set[str]) -> float:
-        if not query_keywords:
-            return 0.0
-        
-        intersection = len(query_keywords & doc_keywords)
-        return intersection / len(query_keywords)
+        return _tokenize(text)
     
     async def _periodic_update(self):
         while True:
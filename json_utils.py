@@ -0,0 +1,32 @@
+import json
+from types import MappingProxyType
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:  # optional speedup, fall back to the stdlib parser
+    orjson = None
+
+def load_json(data: Union[bytes, bytearray, memoryview, str]) -> Any:
+    # Parse with orjson when installed; the stdlib parser needs a bytes copy
+    # of a memoryview
+    if orjson is not None:
+        return orjson.loads(data)
+    if isinstance(data, memoryview):
+        data = data.tobytes()
+    return json.loads(data)
+
+def dump_json(obj: Any) -> bytes:
+    if orjson is not None:
+        # The stdlib encoder turns int/float/bool keys into strings; match it
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj).encode()
+
+def freeze_json(value: Any) -> Any:
+    # Read-only copy of parsed JSON: objects become mapping proxies and
+    # arrays become tuples, all the way down
+    if isinstance(value, dict):
+        return MappingProxyType({key: freeze_json(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(freeze_json(item) for item in value)
+    return value
@@ -2,24 +2,35 @@ import unittest
 import asyncio
 import json
 import os
+import tempfile
+import time
+from dataclasses import asdict, replace
 from datetime import datetime
 from typing import Dict, List
 
-# Import modules
-from xeros.code_assistance_module.code_review import SolanaCodeReviewer
-from xeros.code_assistance_module.test_generator import SolanaTestGenerator
-from xeros.code_assistance_module.optimizer import SolanaOptimizer
-from xeros.code_assistance_module.problem_solver import SolanaProblemSolver
-from xeros.document_retrieval_module.document_retriever import SolanaDocumentRetriever
-from xeros.development_toolchain_module.toolchain_manager import ToolchainManager
-from xeros.development_toolchain_module.workflow_chains import WorkflowChainManager
+__all__ = ["TestXerosAssistant"]
 
 class TestXerosAssistant(unittest.TestCase):
     @classmethod
     def setUpClass(cls):
+        # Import modules here rather than at module level so test discovery
+        # does not pay for importing the whole application
+        from xeros.code_assistance_module.code_review import SolanaCodeReviewer
+        from xeros.code_assistance_module.test_generator import SolanaTestGenerator
+        from xeros.code_assistance_module.optimizer import SolanaOptimizer
+        from xeros.code_assistance_module.problem_solver import SolanaProblemSolver
+        from xeros.document_retrieval_module.document_retriever import SolanaDocumentRetriever
+        from xeros.development_toolchain_module.toolchain_manager import ToolchainManager
+        from xeros.development_toolchain_module.workflow_chains import WorkflowChainManager
+        from xeros.json_utils import load_json
+        
         # Load configurations
-        with open('/home/ubuntu/program1/xeros/agent_config/config.json', 'r') as f:
-            cls.agent_config = json.load(f)
+        with open('/home/ubuntu/program1/xeros/agent_config/config.json', 'rb') as f:
+            data = f.read()
+        cls.agent_config = load_json(data)
+        # Contract source shared by the code assistance and security tests
+        with open('/home/ubuntu/program1/xeros/code_assistance_module/code_templates/token_contract.rs', 'r') as f:
+            cls.test_code = f.read()
         
         # Initialize components
         cls.code_reviewer = SolanaCodeReviewer(cls.agent_config)
@@ -29,39 +40,59 @@ class TestXerosAssistant(unittest.TestCase):
         cls.doc_retriever = SolanaDocumentRetriever(cls.agent_config)
         cls.toolchain_manager = ToolchainManager('/home/ubuntu/program1/xeros/development_toolchain_module/config.json')
         cls.workflow_manager = WorkflowChainManager('/home/ubuntu/program1/xeros/development_toolchain_module/config.json')
+        
+        # One event loop for the whole class instead of a new one per test
+        cls.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(cls.loop)
     
-    def setUp(self):
-        self.loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(self.loop)
-    
-    def tearDown(self):
-        self.loop.close()
+    @classmethod
+    def tearDownClass(cls):
+        cls.loop.close()
+        asyncio.set_event_loop(None)
     
     def test_code_assistance_module(self):
         """Test code assistance functionality"""
-        # Test code review
-        with open('/home/ubuntu/program1/xeros/code_assistance_module/code_templates/token_contract.rs', 'r') as f:
-            test_code = f.read()
+        test_code = self.test_code
         
-        review_result = self.loop.run_until_complete(
-            self.code_reviewer.review_code(test_code)
-        )
+        # Review, test generation and optimization are independent; run them together
+        review_result, test_cases, suggestions = self.loop.run_until_complete(asyncio.gather(
+            self.code_reviewer.review_code(test_code),
+            self.test_generator.generate_tests(test_code),
+            self.optimizer.analyze_code(test_code)
+        ))
+        
+        # Test code review
         self.assertIsNotNone(review_result)
         self.assertTrue(len(review_result.security_issues) > 0)
         
         # Test test generation
-        test_cases = self.loop.run_until_complete(
-            self.test_generator.generate_tests(test_code)
-        )
         self.assertIsNotNone(test_cases)
         self.assertTrue(len(test_cases) > 0)
         
         # Test optimization suggestions
-        suggestions = self.loop.run_until_complete(
-            self.optimizer.analyze_code(test_code)
-        )
         self.assertIsNotNone(suggestions)
         self.assertTrue(len(suggestions) > 0)
+        
+        # The prompts parse shared by every instance is read-only all the way down
+        with self.assertRaises(TypeError):
+            self.code_reviewer.prompts['code_review']['prompt'] = ''
+    
+    def test_code_assistance_memoization(self):
+        """Test that memoized analysis accepts keyword calls and isolates results"""
+        source = "pub fn memoized_transfer() {}"
+        first = self.loop.run_until_complete(self.test_generator.generate_tests(contract_code=source))
+        self.assertTrue(len(first) > 0)
+        first.clear()
+        
+        # The cached result is unaffected by what a caller did with its copy
+        second = self.loop.run_until_complete(self.test_generator.generate_tests(source))
+        self.assertTrue(len(second) > 0)
+        second.append(None)
+        third = self.loop.run_until_complete(self.test_generator.generate_tests(source))
+        self.assertNotIn(None, third)
+        
+        suggestions = self.loop.run_until_complete(self.optimizer.analyze_code(contract_code=source))
+        self.assertIsInstance(suggestions, list)
     
     def test_document_retrieval_module(self):
         """Test document retrieval functionality"""
@@ -85,8 +116,136 @@ class TestXerosAssistant(unittest.TestCase):
         )
         self.assertIsNotNone(solution)
     
+    def test_document_query_coalescing(self):
+        """Test that concurrent identical queries share one search"""
+        from xeros.document_retrieval_module.document_retriever import SearchResult, SolanaDocumentRetriever
+        
+        retriever = SolanaDocumentRetriever(self.agent_config)
+        searches = []
+        
+        async def scenario():
+            release = asyncio.Event()
+            
+            async def slow_search(query, category):
+                searches.append(query)
+                await release.wait()
+                if query == "broken":
+                    raise RuntimeError("search failed")
+                return SearchResult(references=[], relevance_score=0.0, timestamp=datetime.now())
+            
+            retriever._search = slow_search
+            
+            # Cancelling the caller that started a search must not cancel the others
+            first = asyncio.ensure_future(retriever.query_documentation("token"))
+            second = asyncio.ensure_future(retriever.query_documentation("token"))
+            failing = [asyncio.ensure_future(retriever.query_documentation("broken")) for _ in range(2)]
+            await asyncio.sleep(0)
+            first.cancel()
+            release.set()
+            
+            with self.assertRaises(asyncio.CancelledError):
+                await first
+            result = await second
+            # A failed search raises its exception in every caller
+            for task in failing:
+                with self.assertRaises(RuntimeError):
+                    await task
+            return result
+        
+        result = self.loop.run_until_complete(scenario())
+        self.assertIsNotNone(result)
+        self.assertEqual(sorted(searches), ["broken", "token"])
+        
+        # The finished search was cached even though its first caller was cancelled
+        cached = self.loop.run_until_complete(retriever.query_documentation("token"))
+        self.assertIs(cached, result)
+        self.assertEqual(len(searches), 2)
+    
+    def test_document_cache(self):
+        """Test the SQLite document cache round trip, expiry and size limit"""
+        from xeros.document_retrieval_module.cache_manager import DocumentCache
+        
+        with tempfile.TemporaryDirectory() as cache_dir:
+            config_path = os.path.join(cache_dir, 'config.json')
+            with open(config_path, 'w') as f:
+                json.dump({'cache_settings': {'ttl_hours': 1, 'max_size_mb': 1, 'cleanup_interval': 3600}}, f)
+            cache = DocumentCache(config_path, cache_dir=cache_dir)
+            reopened = DocumentCache(config_path, cache_dir=cache_dir)
+            try:
+                # Values round-trip through the database, non-str keys included, and
+                # later changes to the stored object do not reach the cache
+                value = {1: 'one', 'items': ['a']}
+                self.loop.run_until_complete(cache.set('doc', value))
+                value['items'].append('b')
+                expected = {'1': 'one', 'items': ['a']}
+                self.assertEqual(self.loop.run_until_complete(cache.get('doc')), expected)
+                # Nor do changes to a value returned by get()
+                self.loop.run_until_complete(cache.get('doc'))['items'].append('MUT')
+                self.assertEqual(self.loop.run_until_complete(cache.get('doc')), expected)
+                self.assertEqual(self.loop.run_until_complete(reopened.get('doc')), expected)
+                self.assertIsNone(self.loop.run_until_complete(cache.get('missing')))
+                
+                # Expired entries are neither served from memory nor from the database
+                settings = cache.settings
+                cache.settings = replace(settings, ttl_seconds=0)
+                self.loop.run_until_complete(cache.set('expired', 'stale'))
+                cache.settings = settings
+                self.assertIsNone(self.loop.run_until_complete(cache.get('expired')))
+                self.assertIsNone(self.loop.run_until_complete(reopened.get('expired')))
+                
+                # Going over the size limit evicts the oldest entries first
+                self.loop.run_until_complete(cache.set('newer', 'fresh'))
+                size = self.loop.run_until_complete(cache.get_cache_size())
+                cache.settings = replace(settings, max_size_bytes=size - 1)
+                self.loop.run_until_complete(cache.ensure_cache_size_limit())
+                self.assertLess(self.loop.run_until_complete(cache.get_cache_size()), size)
+                self.assertIsNone(self.loop.run_until_complete(cache.get('doc')))
+                self.assertEqual(self.loop.run_until_complete(cache.get('newer')), 'fresh')
+            finally:
+                cache.close()
+                reopened.close()
+    
+    def test_index_manager(self):
+        """Test keyword index search, re-indexing and result ordering"""
+        from xeros.document_retrieval_module.index_manager import IndexManager
+        
+        manager = IndexManager('/home/ubuntu/program1/xeros/document_retrieval_module/config.json')
+        
+        def search(query, category=None):
+            return self.loop.run_until_complete(manager.search(query, category))
+        
+        documents = [
+            ("a", "Token program guide", "development"),
+            ("b", "Token transfer", "cli"),
+            ("c", "The token program.", "development"),
+            ("d", "Token accounts", "programs")
+        ]
+        for doc_id, content, category in documents:
+            self.loop.run_until_complete(manager.index_document(doc_id, content, category))
+        
+        # Re-indexing a document drops its old keywords and category
+        self.loop.run_until_complete(manager.index_document("a", "Stake pool", "cli"))
+        self.assertEqual(search("guide"), [])
+        self.assertEqual(search("stake"), ["a"])
+        self.assertEqual(search("program", "development"), ["c"])
+        
+        # Better matches come first, then the category filter narrows the results
+        self.assertEqual(search("token program!"), ["c", "b", "d"])
+        self.assertEqual(search("token", "cli"), ["b"])
+        self.assertEqual(search("token", "missing"), [])
+        
+        # Equally relevant documents are capped at max_results in id order
+        manager.settings = replace(manager.settings, max_results=2)
+        self.assertEqual(search("token"), ["b", "c"])
+        
+        # Queries without keywords match nothing
+        self.assertEqual(search(""), [])
+        self.assertEqual(search("the and a"), [])
+    
     def test_toolchain_support_module(self):
         """Test development toolchain functionality"""
+        from xeros.development_toolchain_module.toolchain_manager import ToolchainManager
+        
         # Test CLI assistance
         cli_help = self.loop.run_until_complete(
             self.toolchain_manager.get_cli_assistance("deployment", "deploy")
@@ -99,72 +258,138 @@ class TestXerosAssistant(unittest.TestCase):
         )
         self.assertIsNotNone(env_issues)
         
+        # Truthy probe results pass and a probe that raises fails
+        manager = ToolchainManager('/home/ubuntu/program1/xeros/development_toolchain_module/config.json')
+        
+        async def version_probe(component, expected_version):
+            return expected_version
+        
+        async def dependency_probe(dependency):
+            if dependency == 'node':
+                raise OSError("node not found")
+            return dependency
+        
+        manager._probe_component_version = version_probe
+        manager._probe_dependency = dependency_probe
+        env_issues = self.loop.run_until_complete(manager.validate_environment())
+        self.assertEqual([issue['issue'] for issue in env_issues], ["Missing dependency: node"])
+        
         # Test deployment guidance
         guidance = self.loop.run_until_complete(
             self.toolchain_manager.get_deployment_guidance()
         )
         self.assertIsNotNone(guidance)
         self.assertTrue(len(guidance) > 0)
+        
+        # Changing returned guidance does not affect later callers
+        expected = [dict(step, commands=list(step['commands'])) for step in guidance]
+        guidance.append({'step': 'junk'})
+        guidance[0]['step'] = 'X'
+        guidance[0]['commands'].append('junk')
+        self.assertEqual(self.loop.run_until_complete(self.toolchain_manager.get_deployment_guidance()), expected)
+        
+        # Test testnet guide
+        testnet_guide = self.loop.run_until_complete(self.toolchain_manager.get_testnet_guide())
+        self.assertIn('setup', json.loads(json.dumps(testnet_guide)))
+        
+        # Test debugging recommendations
+        recommendations = self.loop.run_until_complete(
+            self.toolchain_manager.get_debug_recommendations("Build failed in Transaction")
+        )
+        self.assertEqual([rec['tool'] for rec in json.loads(json.dumps(recommendations))], ['cargo-expand', 'solana logs'])
     
     def test_workflow_chains(self):
         """Test workflow chain functionality"""
-        # Test project initialization chain
-        init_chain_id = self.loop.run_until_complete(
-            self.workflow_manager.create_initialization_chain()
-        )
+        # The three chains are independent, so create and execute them concurrently
+        init_chain_id, deploy_chain_id, diag_chain_id = self.loop.run_until_complete(asyncio.gather(
+            self.workflow_manager.create_initialization_chain(),
+            self.workflow_manager.create_deployment_chain(),
+            self.workflow_manager.create_diagnostic_chain()
+        ))
         self.assertIsNotNone(init_chain_id)
-        init_success = self.loop.run_until_complete(
-            self.workflow_manager.execute_chain(init_chain_id)
-        )
+        self.assertIsNotNone(deploy_chain_id)
+        self.assertIsNotNone(diag_chain_id)
+        
+        init_success, deploy_success, diag_success = self.loop.run_until_complete(asyncio.gather(
+            self.workflow_manager.execute_chain(init_chain_id),
+            self.workflow_manager.execute_chain(deploy_chain_id),
+            self.workflow_manager.execute_chain(diag_chain_id)
+        ))
+        
+        # Test project initialization chain
         self.assertTrue(init_success)
         init_status = self.workflow_manager.get_chain_status(init_chain_id)
         self.assertEqual(init_status['status'], 'completed')
         
         # Test deployment chain
-        deploy_chain_id = self.loop.run_until_complete(
-            self.workflow_manager.create_deployment_chain()
-        )
-        self.assertIsNotNone(deploy_chain_id)
-        deploy_success = self.loop.run_until_complete(
-            self.workflow_manager.execute_chain(deploy_chain_id)
-        )
         self.assertTrue(deploy_success)
         deploy_status = self.workflow_manager.get_chain_status(deploy_chain_id)
         self.assertEqual(deploy_status['status'], 'completed')
         
         # Test diagnostic chain
-        diag_chain_id = self.loop.run_until_complete(
-            self.workflow_manager.create_diagnostic_chain()
-        )
-        self.assertIsNotNone(diag_chain_id)
-        diag_success = self.loop.run_until_complete(
-            self.workflow_manager.execute_chain(diag_chain_id)
-        )
         self.assertTrue(diag_success)
         diag_status = self.workflow_manager.get_chain_status(diag_chain_id)
         self.assertEqual(diag_status['status'], 'completed')
         
         # Verify chain steps
-        init_steps = init_status['steps']
-        self.assertTrue(any(step['name'] == 'environment_check' for step in init_steps))
-        self.assertTrue(any(step['name'] == 'template_generation' for step in init_steps))
-        self.assertTrue(any(step['name'] == 'dependency_setup' for step in init_steps))
-        
-        deploy_steps = deploy_status['steps']
-        self.assertTrue(any(step['name'] == 'code_review' for step in deploy_steps))
-        self.assertTrue(any(step['name'] == 'test_validation' for step in deploy_steps))
-        self.assertTrue(any(step['name'] == 'deployment_verification' for step in deploy_steps))
-        
-        diag_steps = diag_status['steps']
-        self.assertTrue(any(step['name'] == 'error_collection' for step in diag_steps))
-        self.assertTrue(any(step['name'] == 'log_analysis' for step in diag_steps))
-        self.assertTrue(any(step['name'] == 'solution_recommendation' for step in diag_steps))
+        init_steps = {step['name'] for step in init_status['steps']}
+        self.assertLessEqual({'environment_check', 'template_generation', 'dependency_setup'}, init_steps)
+        
+        deploy_steps = {step['name'] for step in deploy_status['steps']}
+        self.assertLessEqual({'code_review', 'test_validation', 'deployment_verification'}, deploy_steps)
+        
+        diag_steps = {step['name'] for step in diag_status['steps']}
+        self.assertLessEqual({'error_collection', 'log_analysis', 'solution_recommendation'}, diag_steps)
+    
+    def test_workflow_step_waves(self):
+        """Test grouping workflow steps into dependency waves"""
+        from xeros.development_toolchain_module.workflow_chains import _plan_waves
+        
+        # Steps without depends_on run one after another
+        self.assertEqual(_plan_waves([{'name': 'a'}, {'name': 'b'}, {'name': 'c'}]), [[0], [1], [2]])
+        # Independent steps share a wave and a join waits for both
+        self.assertEqual(_plan_waves([
+            {'name': 'a', 'depends_on': []},
+            {'name': 'b', 'depends_on': []},
+            {'name': 'c', 'depends_on': ['a', 'b']},
+            {'name': 'd'}
+        ]), [[0, 1], [2], [3]])
+        
+        with self.assertRaisesRegex(ValueError, 'unknown steps'):
+            _plan_waves([{'name': 'a', 'depends_on': ['missing']}])
+        with self.assertRaisesRegex(ValueError, 'Circular'):
+            _plan_waves([{'name': 'a', 'depends_on': ['b']}, {'name': 'b', 'depends_on': ['a']}])
+    
+    def test_workflow_chain_cleanup(self):
+        """Test that cleanup judges chains by their latest completion"""
+        from xeros.development_toolchain_module.workflow_chains import WorkflowChainManager
+        
+        manager = WorkflowChainManager('/home/ubuntu/program1/xeros/development_toolchain_module/config.json')
+        rerun_id = self.loop.run_until_complete(manager.create_deployment_chain())
+        pending_id = self.loop.run_until_complete(manager.create_diagnostic_chain())
+        
+        self.assertTrue(self.loop.run_until_complete(manager.execute_chain(rerun_id)))
+        first_end = manager.active_chains[rerun_id].end_time_mono
+        time.sleep(0.01)
+        self.assertTrue(self.loop.run_until_complete(manager.execute_chain(rerun_id)))
+        last_end = manager.active_chains[rerun_id].end_time_mono
+        
+        # A cutoff between the two runs only expires the stale first entry
+        max_age_hours = (time.monotonic() - (first_end + last_end) / 2) / 3600
+        self.loop.run_until_complete(manager.cleanup_completed_chains(max_age_hours=max_age_hours))
+        self.assertIn(rerun_id, manager.active_chains)
+        self.assertEqual(len(manager._completion_heap), 1)
+        
+        # Every finished chain is now old enough; chains never executed stay
+        self.loop.run_until_complete(manager.cleanup_completed_chains(max_age_hours=0))
+        self.assertNotIn(rerun_id, manager.active_chains)
+        self.assertIn(pending_id, manager.active_chains)
+        self.assertEqual(manager._completion_heap, [])
     
     def test_security_requirements(self):
         """Test security implementation"""
         # Test code review security checks
-        with open('/home/ubuntu/program1/xeros/code_assistance_module/code_templates/token_contract.rs', 'r') as f:
-            test_code = f.read()
+        test_code = self.test_code
         
         review_result = self.loop.run_until_complete(
             self.code_reviewer.review_code(test_code)
@@ -175,6 +400,8 @@ class TestXerosAssistant(unittest.TestCase):
         self.assertTrue(any(issue['type'] == 'access_control' for issue in security_issues))
         self.assertTrue(any(issue['type'] == 'input_validation' for issue in security_issues))
         self.assertTrue(any(issue['type'] == 'arithmetic' for issue in security_issues))
+        # Findings are plain data that serialize with the rest of the result
+        self.assertIn('arithmetic', json.dumps(asdict(review_result)))
         
         # Test configuration security settings
         self.assertTrue(self.agent_config['security']['code_review_required'])
@@ -204,7 +431,7 @@ class TestXerosAssistant(unittest.TestCase):
     def test_performance_requirements(self):
         """Test performance implementation"""
         # Test response optimization
-        start_time = datetime.now()
+        start_time = time.perf_counter()
         
         # Test parallel execution of multiple operations
         tasks = [
@@ -220,7 +447,7 @@ class TestXerosAssistant(unittest.TestCase):
         self.assertTrue(all(result is not None for result in results))
         
         # Check response time
-        execution_time = (datetime.now() - start_time).total_seconds()
+        execution_time = time.perf_counter() - start_time
         self.assertLess(execution_time, 5.0)  # Should complete within 5 seconds
         
         # Test resource management
@@ -251,21 +478,24 @@ class TestXerosAssistant(unittest.TestCase):
         self.assertIsNotNone(solution)
         self.assertTrue(len(solution.code_example) > 0)
         self.assertTrue(len(solution.references) > 0)
-
+        # The shared canned solution cannot be changed through a result
+        with self.assertRaises(AttributeError):
+            solution.references.append("https://example.com")
+        
         # Test code generation accuracy
         test_code = self.loop.run_until_complete(
             self.test_generator.generate_tests("pub fn initialize() {}")
         )
         self.assertTrue(any(t.name == "test_initialization" for t in test_code))
         self.assertTrue(all(len(t.test_code) > 0 for t in test_code))
-
+        
         # Test documentation accuracy
         docs = self.loop.run_until_complete(
             self.doc_retriever.query_documentation("token program")
         )
         self.assertTrue(any(ref.title == "Token Program Guide" for ref in docs.references))
         self.assertTrue(all(ref.url.startswith("https://") for ref in docs.references))
-
+        
         # Test workflow chain accuracy
         init_chain_id = self.loop.run_until_complete(
             self.workflow_manager.create_initialization_chain()
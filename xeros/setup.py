@@ -5,12 +5,16 @@ setup(
     version="0.1.0",
     packages=find_packages(),
     install_requires=[
-        "aiohttp",
-        "asyncio",
-        "dataclasses",
-        "typing",
+        "aiohttp>=3.9",
     ],
+    extras_require={
+        # Optional speedups, used automatically when installed
+        "speedups": [
+            "orjson",
+            "uvloop",
+        ],
+    },
     author="Xeros Team",
     description="Xeros - A Solana Development Assistant",
-    python_requires=">=3.7",
+    python_requires=">=3.10",
 )